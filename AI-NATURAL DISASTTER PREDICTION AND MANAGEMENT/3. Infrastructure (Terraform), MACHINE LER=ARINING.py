@@ -88,7 +88,7 @@ resource "aws_security_group" "api_sg" {
 
 resource "aws_instance" "api_server" {
   ami             = "ami-0c55b159cbfafe1f0" # Ubuntu 20.04 LTS
-  instance_type   = "t3.large"
+  instance_type   = "c6i.xlarge" # AVX-512 for inference; 8 GiB like t3.large for two workers
   subnet_id       = aws_subnet.public_subnet.id
   security_groups = [aws_security_group.api_sg.name]
   key_name        = "disaster-key"
@@ -99,7 +99,9 @@ resource "aws_instance" "api_server" {
               apt-get install -y docker.io
               systemctl start docker
               systemctl enable docker
-              docker run -d -p 8000:8000 --name disaster-api disaster-prediction-api:latest
+              docker run -d -p 8000:8000 --name disaster-api disaster-prediction-api:latest \
+                uvicorn BACKEND:app --host 0.0.0.0 --port 8000 --workers 2 \
+                --loop uvloop --http httptools --log-level warning
               EOF
 
   tags = {
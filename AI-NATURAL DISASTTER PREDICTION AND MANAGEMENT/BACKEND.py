@@ -1,18 +1,34 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import load_model
+import onnxruntime as ort
 from sklearn.ensemble import RandomForestClassifier
 import joblib
+import treelite
+import tl2cgen
+import os
+import fcntl
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import aiohttp
 import asyncio
-from geopy.distance import great_circle
-from shapely.geometry import Point
+import calendar
+import functools
+import time
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+import msgspec
+from numba import njit
+from shapely.geometry import Point, Polygon
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+import h3
 import geopandas as gpd
 
 app = FastAPI(
@@ -30,18 +46,338 @@ app.add_middleware(
 )
 
 # Models and Data Loading
+def artifact_is_fresh(target: str, source: str) -> bool:
+    # Images built with build-artifacts may ship only the derived file, without its source
+    return os.path.exists(target) and (
+        not os.path.exists(source) or os.path.getmtime(target) >= os.path.getmtime(source)
+    )
+
+def build_artifact(source: str, target: str, build) -> None:
+    """Run build(path) to derive target from source unless target is already newer.
+
+    The build writes to a temporary file that is moved into place with os.replace while
+    holding an exclusive file lock, so concurrent workers never read a half-written
+    artifact and only one of them does the work.
+    """
+    if artifact_is_fresh(target, source):
+        return
+    with open(target + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if artifact_is_fresh(target, source):
+                return  # another worker built it while we waited for the lock
+            root, ext = os.path.splitext(target)
+            tmp_path = f'{root}.{os.getpid()}.tmp{ext}'
+            try:
+                build(tmp_path)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def ensure_onnx_model(keras_path: str, onnx_path: str) -> None:
+    def convert(path: str):
+        # TensorFlow is only needed for the one-off conversion, so keep it out of serving workers
+        import tensorflow as tf
+        import tf2onnx
+        from tensorflow.keras.models import load_model
+
+        keras_model = load_model(keras_path)
+        spec = (tf.TensorSpec(keras_model.inputs[0].shape, tf.float32, name="input"),)
+        tf2onnx.convert.from_keras(keras_model, input_signature=spec, output_path=path)
+
+    build_artifact(keras_path, onnx_path, convert)
+
+def ensure_tree_library(pickle_path: str, lib_path: str) -> None:
+    def compile_forest(path: str):
+        forest = treelite.sklearn.import_model(joblib.load(pickle_path))
+        tl2cgen.export_lib(forest, toolchain="gcc", libpath=path,
+                           params={"parallel_comp": 32, "quantize": 1})
+
+    build_artifact(pickle_path, lib_path, compile_forest)
+
+def ensure_geoparquet(name: str) -> str:
+    geojson_path = f'data/{name}.geojson'
+    parquet_path = f'data/{name}.parquet'
+    build_artifact(geojson_path, parquet_path, lambda path: gpd.read_file(geojson_path).to_parquet(path))
+    return parquet_path
+
+def build_artifacts() -> None:
+    """Derive every ONNX model, compiled forest and GeoParquet file ahead of serving"""
+    for name in ('earthquake_lstm', 'hurricane_lstm'):
+        ensure_onnx_model(f'models/{name}.h5', f'models/{name}.onnx')
+    for name in ('flood_rf', 'wildfire_rf'):
+        ensure_tree_library(f'models/{name}.pkl', f'models/{name}.so')
+    for name in ('regions', 'evacuation_routes', 'shelters'):
+        ensure_geoparquet(name)
+
+def load_onnx_session(keras_path: str, onnx_path: str) -> ort.InferenceSession:
+    """Open an ONNX Runtime session, (re)converting the Keras model when it is newer"""
+    ensure_onnx_model(keras_path, onnx_path)
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    # One dummy run so the first real request does not pay for kernel setup
+    model_input = session.get_inputs()[0]
+    shape = [dim if isinstance(dim, int) else 1 for dim in model_input.shape]
+    session.run(None, {model_input.name: np.zeros(shape, dtype=np.float32)})
+    return session
+
+def load_tree_predictor(pickle_path: str, lib_path: str) -> tl2cgen.Predictor:
+    """Load a compiled random forest, (re)building the shared library when the pickle is newer"""
+    ensure_tree_library(pickle_path, lib_path)
+    return tl2cgen.Predictor(lib_path, nthread=2)
+
+def positive_class_proba(predictor: tl2cgen.Predictor, features: np.ndarray) -> np.ndarray:
+    """Probability of the positive class for each row, like predict_proba(X)[:, 1]"""
+    features = np.asarray(features, dtype=np.float32)
+    predictions = predictor.predict(tl2cgen.DMatrix(features))
+    return np.asarray(predictions).reshape(features.shape[0], -1)[:, -1]
+
+def read_geodata(name: str) -> gpd.GeoDataFrame:
+    """Read data/<name> from GeoParquet, (re)converting the GeoJSON source when it is newer"""
+    return gpd.read_parquet(ensure_geoparquet(name))
+
+H3_RESOLUTION = 8
+
+# Planar hexagons from cell_to_boundary differ from the true cell edges by millimetres;
+# pad them so a cell is only indexed when every point in it is inside the region
+HEXAGON_MARGIN_DEG = 1e-6
+
+def build_cell_index(geometries, tree: STRtree, resolution: int = H3_RESOLUTION) -> Dict[str, int]:
+    """Map H3 cells whose every point resolves to one region to that region's position.
+
+    A cell maps to region idx only if idx properly contains it and no lower-positioned
+    region touches it, so a hit always agrees with the lowest-position R-tree fallback.
+    """
+    cell2region = {}
+    for idx, geometry in enumerate(geometries):
+        prepared = prep(geometry)  # many containment tests against the same polygon
+        for cell in h3.geo_to_cells(geometry, resolution):
+            hexagon = Polygon([(lng, lat) for lat, lng in h3.cell_to_boundary(cell)])
+            hexagon = hexagon.buffer(HEXAGON_MARGIN_DEG)
+            # Cells straddling a border are left out and resolved by the R-tree instead
+            if not prepared.contains_properly(hexagon):
+                continue
+            if any(other < idx for other in tree.query(hexagon, predicate="intersects")):
+                continue
+            cell2region[cell] = idx
+    return cell2region
+
+class RegionData:
+    """Region attributes as NumPy arrays plus the geometry indexes used for point lookup"""
+
+    def __init__(self, regions: gpd.GeoDataFrame):
+        polygons = regions.geometry.to_numpy()
+        self.tree = STRtree(polygons)  # R-tree over polygon bounding boxes
+        self.prepared = [prep(polygon) for polygon in polygons]
+        self.cell2region = build_cell_index(polygons, self.tree)
+        self.elevation = regions['elevation'].to_numpy(np.float32)
+        self.river_dist = regions['river_dist'].to_numpy(np.float32)
+        self.soil_moisture = regions['soil_moisture'].to_numpy(np.float32)
+
+    def find(self, lon: float, lat: float) -> Optional[int]:
+        """Position of the lowest-positioned region containing the point, or None"""
+        idx = self.cell2region.get(h3.latlng_to_cell(lat, lon, H3_RESOLUTION))
+        if idx is None:
+            point = Point(lon, lat)
+            # Bounding-box candidates from the R-tree, then an exact prepared-polygon test
+            idx = next((int(i) for i in np.sort(self.tree.query(point))
+                        if self.prepared[i].contains(point)), None)
+        return idx
+
+class ShelterData:
+    """Shelters as struct-of-arrays; the GeoDataFrame is dropped after load"""
+
+    def __init__(self, shelters: gpd.GeoDataFrame):
+        self.xy = np.column_stack([
+            shelters.geometry.x.to_numpy(np.float64),
+            shelters.geometry.y.to_numpy(np.float64)
+        ])
+        self.lat = np.ascontiguousarray(np.radians(self.xy[:, 1]))
+        self.lon = np.ascontiguousarray(np.radians(self.xy[:, 0]))
+        self.cap = shelters['capacity'].to_numpy(np.int32)
+        self.id = shelters['id'].to_numpy()
+
+def lazy_resource(loader):
+    """Property that loads its value on first access and records when it was last used"""
+    name = loader.__name__
+
+    def getter(self):
+        self._last_used[name] = time.monotonic()
+        value = self._loaded.get(name)
+        if value is None:
+            # Per-resource lock: concurrent first accesses load once without blocking other resources
+            with self._locks.setdefault(name, threading.Lock()):
+                value = self._loaded.get(name)
+                if value is None:
+                    value = self._loaded[name] = loader(self)
+        return value
+
+    return property(getter, doc=loader.__doc__)
+
 class DisasterModels:
+    # Large models that can be dropped after sitting idle and reloaded on demand
+    EVICTABLE = ('earthquake_session', 'hurricane_session', 'flood_predictor', 'wildfire_predictor')
+
     def __init__(self):
-        self.earthquake_model = load_model('models/earthquake_lstm.h5')
-        self.flood_model = joblib.load('models/flood_rf.pkl')
-        self.wildfire_model = joblib.load('models/wildfire_rf.pkl')
-        self.hurricane_model = load_model('models/hurricane_lstm.h5')
-        self.regions = gpd.read_file('data/regions.geojson')
-        self.evacuation_routes = gpd.read_file('data/evacuation_routes.geojson')
-        self.shelters = gpd.read_file('data/shelters.geojson')
+        self._locks = {}
+        self._loaded = {}
+        self._last_used = {}
+
+    @lazy_resource
+    def earthquake_session(self) -> ort.InferenceSession:
+        return load_onnx_session('models/earthquake_lstm.h5', 'models/earthquake_lstm.onnx')
+
+    @lazy_resource
+    def earthquake_input(self) -> str:
+        return self.earthquake_session.get_inputs()[0].name
+
+    @lazy_resource
+    def flood_predictor(self) -> tl2cgen.Predictor:
+        return load_tree_predictor('models/flood_rf.pkl', 'models/flood_rf.so')
+
+    @lazy_resource
+    def wildfire_predictor(self) -> tl2cgen.Predictor:
+        return load_tree_predictor('models/wildfire_rf.pkl', 'models/wildfire_rf.so')
+
+    @lazy_resource
+    def hurricane_session(self) -> ort.InferenceSession:
+        return load_onnx_session('models/hurricane_lstm.h5', 'models/hurricane_lstm.onnx')
+
+    @lazy_resource
+    def regions(self) -> RegionData:
+        return RegionData(read_geodata('regions'))
+
+    @lazy_resource
+    def evacuation_routes(self) -> gpd.GeoDataFrame:
+        return read_geodata('evacuation_routes')
+
+    @lazy_resource
+    def shelters(self) -> ShelterData:
+        return ShelterData(read_geodata('shelters'))
+
+    def evict_idle(self, max_idle: float) -> List[str]:
+        """Unload evictable models unused for max_idle seconds; returns the evicted names"""
+        now = time.monotonic()
+        evicted = []
+        for name in self.EVICTABLE:
+            lock = self._locks.get(name)
+            # Skip anything being loaded right now rather than waiting for it
+            if lock is None or not lock.acquire(blocking=False):
+                continue
+            try:
+                if name in self._loaded and now - self._last_used.get(name, now) > max_idle:
+                    del self._loaded[name]
+                    evicted.append(name)
+            finally:
+                lock.release()
+        if evicted:
+            gc.collect()
+        return evicted
+
+    def infer_earthquake(self, features: np.ndarray) -> np.ndarray:
+        inputs = {self.earthquake_input: features.astype(np.float32, copy=False)}
+        return self.earthquake_session.run(None, inputs)[0]
 
 models = DisasterModels()
 
+# CPU-bound work (inference, GEOS, Numba) runs here so the event loop stays free for I/O
+cpu_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+
+MODEL_IDLE_SECONDS = float(os.environ.get('MODEL_IDLE_SECONDS', 600))  # 0 disables eviction
+EVICTION_CHECK_SECONDS = 60
+
+eviction_task: asyncio.Task = None
+
+async def evict_idle_models():
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(EVICTION_CHECK_SECONDS)
+        # Off the loop: gc.collect() after dropping a model can take a while
+        await loop.run_in_executor(cpu_executor, models.evict_idle, MODEL_IDLE_SECONDS)
+
+@app.on_event("startup")
+async def start_model_eviction():
+    global eviction_task
+    if MODEL_IDLE_SECONDS > 0:
+        eviction_task = asyncio.create_task(evict_idle_models())
+
+# Inference Batching
+MAX_BATCH = 32
+BATCH_WINDOW_SECONDS = 0.005
+
+class InferenceBatcher:
+    """Coalesce concurrent single-sample requests into one model call"""
+
+    def __init__(self, infer, max_batch: int = MAX_BATCH, window: float = BATCH_WINDOW_SECONDS):
+        self.infer = infer
+        self.max_batch = max_batch
+        self.window = window
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def predict(self, features: np.ndarray) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def _collect(self) -> List:
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        while len(items) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+
+            # Only samples with the same time window can share a batch
+            groups: Dict[tuple, List] = {}
+            for features, future in items:
+                groups.setdefault(features.shape[1:], []).append((features, future))
+
+            for group in groups.values():
+                batch = np.concatenate([features for features, _ in group], axis=0)
+                try:
+                    predictions = np.asarray(await loop.run_in_executor(cpu_executor, self.infer, batch))
+                except Exception as exc:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+
+                offset = 0
+                for features, future in group:
+                    size = features.shape[0]
+                    if not future.done():
+                        future.set_result(predictions[offset:offset + size])
+                    offset += size
+
+earthquake_batcher = InferenceBatcher(models.infer_earthquake)
+
+@app.on_event("startup")
+async def start_batchers():
+    earthquake_batcher.start()
+
 # Data Models
 class Location(BaseModel):
     lat: float
@@ -50,82 +386,202 @@ class Location(BaseModel):
 class PredictionRequest(BaseModel):
     location: Location
     disaster_type: str  # 'earthquake', 'flood', 'wildfire', 'hurricane'
-    time_window: int = 7  # days
+    time_window: int = Field(7, ge=1, le=366)  # days; feature prep covers at most one year
 
 class EvacuationRequest(BaseModel):
     start_point: Location
     disaster_type: str
     disaster_radius: float  # in km
 
+# Alert Response Models (msgspec: encoded directly, bypassing FastAPI's JSON encoder)
+class AlertLocation(msgspec.Struct):
+    lat: float
+    lon: float
+
+class Quake(msgspec.Struct):
+    magnitude: Optional[float]
+    location: AlertLocation
+    time: str
+
+class WeatherAlert(msgspec.Struct):
+    event: Optional[str]
+    severity: Optional[str]
+    area: Optional[str]
+
+class Alerts(msgspec.Struct):
+    earthquakes: List[Quake]
+    weather_alerts: List[WeatherAlert]
+
 # External API Clients
-class DataFetcher:
-    USGS_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-    NOAA_URL = "https://api.weather.gov/alerts/active"
-
-    async def fetch_earthquakes(self, days: int = 1) -> List[Dict]:
-        params = {
-            "format": "geojson",
-            "starttime": (datetime.now() - timedelta(days=days)).isoformat(),
-            "minmagnitude": 2.5
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.USGS_URL, params=params) as response:
-                data = await response.json()
-                return data.get('features', [])
+USGS_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+NOAA_URL = "https://api.weather.gov/alerts/active"
+
+http_session: aiohttp.ClientSession = None
+
+@app.on_event("startup")
+async def open_http_session():
+    global http_session
+    http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=10)
+    )
+
+@app.on_event("shutdown")
+async def close_http_session():
+    await http_session.close()
+
+@app.on_event("shutdown")
+async def stop_cpu_executor():
+    cpu_executor.shutdown(wait=False)
+
+ALERTS_TTL_SECONDS = 30
+
+def async_ttl_cache(ttl: float):
+    """Single-flight cache for a no-argument coroutine function.
+
+    Concurrent callers share one in-flight call, and a successful result is reused
+    until ttl seconds after it completed. Failures are not cached.
+    """
+    def decorator(fn):
+        state = {"expiry": 0.0, "future": None}
+
+        def on_done(future: asyncio.Future):
+            if future.cancelled() or future.exception() is not None:
+                state["future"] = None
+            else:
+                state["expiry"] = time.monotonic() + ttl
+
+        @functools.wraps(fn)
+        async def wrapper():
+            future = state["future"]
+            if future is None or (future.done() and time.monotonic() >= state["expiry"]):
+                future = asyncio.ensure_future(fn())
+                future.add_done_callback(on_done)
+                state["future"] = future
+            # Shield so one disconnecting client does not cancel the shared fetch
+            return await asyncio.shield(future)
 
-    async def fetch_weather_alerts(self) -> List[Dict]:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.NOAA_URL) as response:
-                data = await response.json()
-                return data.get('features', [])
+        return wrapper
+    return decorator
+
+async def fetch_earthquakes(days: int = 1) -> List[Dict]:
+    params = {
+        "format": "geojson",
+        "starttime": (datetime.now() - timedelta(days=days)).isoformat(),
+        "minmagnitude": 2.5
+    }
+    async with http_session.get(USGS_URL, params=params) as response:
+        data = await response.json(loads=orjson.loads)
+        return data.get('features', [])
+
+async def fetch_weather_alerts() -> List[Dict]:
+    async with http_session.get(NOAA_URL) as response:
+        data = await response.json(loads=orjson.loads)
+        return data.get('features', [])
+
+# Geometry Helpers
+EARTH_RADIUS_KM = 6371.0
+SHELTER_CANDIDATES = 4  # recommended shelter plus alternatives
+
+# Serial and nogil: it runs on cpu_executor threads, which supply the parallelism. Numba's own
+# parallel mode would oversubscribe the cores, and its default workqueue layer is not thread-safe.
+@njit(fastmath=True, cache=True, nogil=True)
+def haversine_topk(lat0, lon0, lat_arr, lon_arr, cap_arr, radius_km, k):
+    """Indices of the k nearest points beyond radius_km, ranked by (distance, -capacity).
+
+    Coordinates are in radians. Returns (top_indices, distances_km).
+    """
+    n = lat_arr.shape[0]
+    dist = np.empty(n, dtype=np.float64)
+    outside = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        dlat = lat_arr[i] - lat0
+        dlon = lon_arr[i] - lon0
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat0) * np.cos(lat_arr[i]) * np.sin(dlon / 2) ** 2
+        dist[i] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        outside[i] = dist[i] > radius_km
+
+    # Single O(N * k) insertion pass keeps only the k best candidates
+    top = np.empty(k, dtype=np.int64)
+    count = 0
+    for i in range(n):
+        if not outside[i]:
+            continue
+        pos = count
+        while pos > 0:
+            j = top[pos - 1]
+            if dist[i] < dist[j] or (dist[i] == dist[j] and cap_arr[i] > cap_arr[j]):
+                if pos < k:
+                    top[pos] = j
+                pos -= 1
+            else:
+                break
+        if pos < k:
+            top[pos] = i
+            if count < k:
+                count += 1
+    return top[:count], dist
+
+def nearest_shelters(lat0: float, lon0: float, radius_km: float):
+    """Rank shelters beyond radius_km; runs on cpu_executor, which also absorbs the first load"""
+    shelter_data = models.shelters
+    top, distances = haversine_topk(lat0, lon0, shelter_data.lat, shelter_data.lon,
+                                    shelter_data.cap, radius_km, SHELTER_CANDIDATES)
+    return shelter_data, top, distances
 
 # Prediction Services
+DAY_OFFSETS = np.arange(366, dtype=np.int32)
+SIMULATED_FEATURE_SCALE = np.array([10, 100], dtype=np.float32)
+feature_rng = np.random.default_rng()
+
 class PredictionService:
     @staticmethod
     def prepare_earthquake_features(location: Location, dates: List[datetime]) -> np.ndarray:
         """Create time-series features for earthquake prediction"""
-        features = []
-        for date in dates:
-            day_of_year = date.timetuple().tm_yday
-            features.append([
-                location.lat,
-                location.lon,
-                day_of_year,
-                np.random.uniform(0, 10),  # simulated seismic activity
-                np.random.uniform(0, 100)  # simulated depth
-            ])
-        return np.array([features])  # shape: (1, timesteps, features)
+        # dates are consecutive days, so day-of-year only needs deriving for the first one
+        timesteps = len(dates)
+        start = dates[0]
+        year_length = 366 if calendar.isleap(start.year) else 365
+        day_of_year = (start.timetuple().tm_yday - 1 + DAY_OFFSETS[:timesteps]) % year_length + 1
+
+        features = np.empty((1, timesteps, 5), dtype=np.float32)  # shape: (1, timesteps, features)
+        features[0, :, 0] = location.lat
+        features[0, :, 1] = location.lon
+        features[0, :, 2] = day_of_year
+        # simulated seismic activity (0-10) and depth (0-100) drawn in one call
+        features[0, :, 3:] = feature_rng.random((timesteps, 2), dtype=np.float32)
+        features[0, :, 3:] *= SIMULATED_FEATURE_SCALE
+        return features
 
     @staticmethod
-    def predict_earthquake(location: Location, dates: List[datetime]) -> List[float]:
+    async def predict_earthquake(location: Location, dates: List[datetime]) -> List[float]:
         features = PredictionService.prepare_earthquake_features(location, dates)
-        predictions = models.earthquake_model.predict(features)[0]
+        predictions = (await earthquake_batcher.predict(features))[0]
         return [float(p) for p in predictions]
 
     @staticmethod
     def predict_flood(location: Location) -> float:
         """Predict flood risk using terrain and weather features"""
-        point = Point(location.lon, location.lat)
-        region = models.regions[models.regions.geometry.contains(point)]
-
-        if len(region) == 0:
+        regions = models.regions
+        idx = regions.find(location.lon, location.lat)
+        if idx is None:
             return 0.0
 
-        elevation = region.iloc[0]['elevation']
-        river_dist = region.iloc[0]['river_dist']
-        soil_moisture = region.iloc[0]['soil_moisture']
+        elevation = regions.elevation[idx]
+        river_dist = regions.river_dist[idx]
+        soil_moisture = regions.soil_moisture[idx]
 
         features = [[elevation, river_dist, soil_moisture]]
-        return float(models.flood_model.predict_proba(features)[0][1])
+        return float(positive_class_proba(models.flood_predictor, features)[0])
 
 # API Endpoints
-@app.post("/predict")
+@app.post("/predict", response_class=ORJSONResponse)
 async def predict_disaster(request: PredictionRequest):
     """Predict disaster risk for a location"""
     dates = [datetime.now() + timedelta(days=i) for i in range(request.time_window)]
 
     if request.disaster_type == 'earthquake':
-        risks = PredictionService.predict_earthquake(request.location, dates)
+        risks = await PredictionService.predict_earthquake(request.location, dates)
         return {
             "disaster": "earthquake",
             "risks": dict(zip([d.isoformat() for d in dates], risks)),
@@ -133,7 +589,8 @@ async def predict_disaster(request: PredictionRequest):
         }
 
     elif request.disaster_type == 'flood':
-        risk = PredictionService.predict_flood(request.location)
+        loop = asyncio.get_running_loop()
+        risk = await loop.run_in_executor(cpu_executor, PredictionService.predict_flood, request.location)
         return {
             "disaster": "flood",
             "risk": risk,
@@ -143,58 +600,101 @@ async def predict_disaster(request: PredictionRequest):
     else:
         raise HTTPException(status_code=400, detail="Disaster type not supported")
 
+@app.websocket("/predict/ws")
+async def stream_earthquake_prediction(websocket: WebSocket):
+    """Stream earthquake risk day by day; one JSON PredictionRequest per message"""
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                request = PredictionRequest(**orjson.loads(await websocket.receive_text()))
+            except (orjson.JSONDecodeError, TypeError, ValidationError) as exc:
+                await websocket.send_text(orjson.dumps({"error": str(exc)}).decode())
+                continue
+
+            if request.disaster_type != 'earthquake':
+                await websocket.send_text(orjson.dumps({"error": "Disaster type not supported"}).decode())
+                continue
+
+            dates = [datetime.now() + timedelta(days=i) for i in range(request.time_window)]
+            try:
+                risks = await PredictionService.predict_earthquake(request.location, dates)
+            except Exception as exc:
+                await websocket.send_text(orjson.dumps({"error": f"Prediction failed: {exc}"}).decode())
+                continue
+
+            for date, risk in zip(dates, risks):
+                await websocket.send_text(orjson.dumps({"date": date.isoformat(), "risk": risk}).decode())
+            await websocket.send_text(orjson.dumps({"done": True}).decode())
+    except WebSocketDisconnect:
+        pass
+
 @app.post("/evacuation")
 async def get_evacuation_route(request: EvacuationRequest):
     """Calculate optimal evacuation route"""
-    start_point = (request.start_point.lat, request.start_point.lon)
-
-    shelters = []
-    for _, shelter in models.shelters.iterrows():
-        shelter_point = (shelter.geometry.y, shelter.geometry.x)
-        distance = great_circle(start_point, shelter_point).km
-        if distance > request.disaster_radius:
-            shelters.append({
-                "id": shelter['id'],
-                "location": {"lat": shelter_point[0], "lon": shelter_point[1]},
-                "distance_km": distance,
-                "capacity": shelter['capacity']
-            })
-
-    shelters = sorted(shelters, key=lambda x: (x['distance_km'], -x['capacity']))
+    lat0 = np.radians(request.start_point.lat)
+    lon0 = np.radians(request.start_point.lon)
+    loop = asyncio.get_running_loop()
+    shelter_data, top, distances = await loop.run_in_executor(
+        cpu_executor, nearest_shelters, lat0, lon0, request.disaster_radius
+    )
+
+    # tolist() turns NumPy scalars into Python values and passes object ids (e.g. str) through
+    ids = shelter_data.id[top].tolist()
+    capacities = shelter_data.cap[top].tolist()
+    shelters = [{
+        "id": shelter_id,
+        "location": {
+            "lat": float(shelter_data.xy[i, 1]),
+            "lon": float(shelter_data.xy[i, 0])
+        },
+        "distance_km": float(distances[i]),
+        "capacity": capacity
+    } for i, shelter_id, capacity in zip(top, ids, capacities)]
 
     if not shelters:
         raise HTTPException(status_code=404, detail="No safe shelters found within parameters")
 
     return {
         "recommended_shelter": shelters[0],
-        "alternative_shelters": shelters[1:4],
+        "alternative_shelters": shelters[1:],
         "disaster_type": request.disaster_type
     }
 
+@async_ttl_cache(ALERTS_TTL_SECONDS)
+async def build_alerts() -> bytes:
+    earthquakes, weather_alerts = await asyncio.gather(fetch_earthquakes(), fetch_weather_alerts())
+
+    alerts = Alerts(
+        earthquakes=[Quake(
+            magnitude=e['properties']['mag'],
+            location=AlertLocation(
+                lat=e['geometry']['coordinates'][1],
+                lon=e['geometry']['coordinates'][0]
+            ),
+            time=datetime.fromtimestamp(e['properties']['time'] / 1000).isoformat()
+        ) for e in earthquakes],
+        weather_alerts=[WeatherAlert(
+            event=a['properties']['event'],
+            severity=a['properties']['severity'],
+            area=a['properties']['areaDesc']
+        ) for a in weather_alerts]
+    )
+    return msgspec.json.encode(alerts)
+
 @app.get("/alerts")
 async def get_realtime_alerts():
     """Fetch real-time disaster alerts"""
-    data_fetcher = DataFetcher()
-    earthquakes = await data_fetcher.fetch_earthquakes()
-    weather_alerts = await data_fetcher.fetch_weather_alerts()
-
-    return {
-        "earthquakes": [{
-            "magnitude": e['properties']['mag'],
-            "location": {
-                "lat": e['geometry']['coordinates'][1],
-                "lon": e['geometry']['coordinates'][0]
-            },
-            "time": datetime.fromtimestamp(e['properties']['time'] / 1000).isoformat()
-        } for e in earthquakes],
-        "weather_alerts": [{
-            "event": a['properties']['event'],
-            "severity": a['properties']['severity'],
-            "area": a['properties']['areaDesc']
-        } for a in weather_alerts]
-    }
+    return Response(content=await build_alerts(), media_type="application/json")
 
 # Run the app
 if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["build-artifacts"]:
+        build_artifacts()
+        sys.exit()
+
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run("BACKEND:app", host="0.0.0.0", port=8000, workers=2,
+                loop="uvloop", http="httptools", log_level="warning")
@@ -1,5 +1,5 @@
 
-import React, ( useState, useEffect ) from 'react';
+import React, ( useState, useEffect, useRef ) from 'react';
 import Map, (Marker, Source, Layer ) from 'react-map-gl';
 import axios from 'axios';
 import (format )from 'date-fns';
@@ -41,6 +41,7 @@ const DisasterPredictionSystem: React.FC = () => {
     latitude: 39.8283,
     zoom: 3,
   });
+  const predictionSocket = useRef<WebSocket | null>(null);
 
   useEffect(() => {
     fetchAlerts();
@@ -48,6 +49,9 @@ const DisasterPredictionSystem: React.FC = () => {
     return () => clearInterval(interval);
   }, []);
 
+  // Close any in-flight prediction stream on unmount
+  useEffect(() => () => closePredictionSocket(), []);
+
   const fetchAlerts = async () => {
     try {
       const response = await axios.get('http://localhost:8000/alerts');
@@ -66,6 +70,12 @@ const DisasterPredictionSystem: React.FC = () => {
       lon: e.lngLat.lng,
     };
     setLocation(clickedLocation);
+    closePredictionSocket();
+
+    if (disasterType === 'earthquake') {
+      streamEarthquakePrediction(clickedLocation);
+      return;
+    }
 
     try {
       const response = await axios.post('http://localhost:8000/predict', {
@@ -79,6 +89,54 @@ const DisasterPredictionSystem: React.FC = () => {
     }
   };
 
+  const closePredictionSocket = () => {
+    const socket = predictionSocket.current;
+    predictionSocket.current = null;
+    socket?.close();
+  };
+
+  const streamEarthquakePrediction = (clickedLocation: Location) => {
+    setPredictions({ disaster: 'earthquake', risks: {}, unit: 'probability' });
+
+    const socket = new WebSocket('ws://localhost:8000/predict/ws');
+    predictionSocket.current = socket;
+    // Only the most recent click's socket may update state
+    const isCurrent = () => predictionSocket.current === socket;
+
+    socket.onopen = () => {
+      socket.send(JSON.stringify({
+        location: clickedLocation,
+        disaster_type: 'earthquake',
+        time_window: 7,
+      }));
+    };
+    socket.onmessage = (event) => {
+      if (!isCurrent()) return;
+      const message = JSON.parse(event.data);
+      if (message.error) {
+        console.error('Error fetching predictions:', message.error);
+        closePredictionSocket();
+      } else if (message.done) {
+        closePredictionSocket();
+      } else {
+        setPredictions((prev) => prev && {
+          ...prev,
+          risks: { ...prev.risks, [message.date]: message.risk },
+        });
+      }
+    };
+    socket.onerror = (error) => {
+      if (isCurrent()) console.error('Error fetching predictions:', error);
+    };
+    socket.onclose = () => {
+      // Still current means the server closed before sending "done"
+      if (isCurrent()) {
+        console.error('Prediction stream closed unexpectedly');
+        predictionSocket.current = null;
+      }
+    };
+  };
+
   const calculateEvacuation = async () => {
     if (!location) return;
     try {
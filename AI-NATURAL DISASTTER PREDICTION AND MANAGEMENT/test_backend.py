@@ -0,0 +1,423 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from shapely.geometry import Point, box
+
+import BACKEND
+from BACKEND import (
+    DisasterModels, InferenceBatcher, Location, PredictionService, RegionData, ShelterData, app, async_ttl_cache, build_artifact,
+    haversine_topk, lazy_resource
+)
+
+
+def baseline_topk(distances, capacities, radius_km, k):
+    """The original endpoint's ranking: full sort by (distance, -capacity), keep k"""
+    candidates = [i for i in range(len(distances)) if distances[i] > radius_km]
+    return sorted(candidates, key=lambda i: (distances[i], -capacities[i]))[:k]
+
+
+def random_shelters(rng, n):
+    lat = np.radians(rng.uniform(-5, 5, n))
+    lon = np.radians(rng.uniform(-5, 5, n))
+    cap = rng.integers(0, 3, n).astype(np.int32)
+    # Repeat coordinates so several shelters tie on distance
+    lat[: n // 3] = lat[0]
+    lon[: n // 3] = lon[0]
+    return lat, lon, cap
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_haversine_topk_matches_sorted_baseline(seed):
+    rng = np.random.default_rng(seed)
+    lat, lon, cap = random_shelters(rng, int(rng.integers(1, 40)))
+
+    top, distances = haversine_topk(0.0, 0.0, lat, lon, cap, 300.0, 4)
+
+    assert list(top) == baseline_topk(distances, cap, 300.0, 4)
+
+
+def test_haversine_topk_fewer_candidates_than_k():
+    rng = np.random.default_rng(0)
+    lat, lon, cap = random_shelters(rng, 30)
+    # Only shelters further out than the chosen radius qualify
+    _, distances = haversine_topk(0.0, 0.0, lat, lon, cap, 0.0, 4)
+    radius = np.sort(distances)[-3]  # leaves exactly 2 candidates
+
+    top, distances = haversine_topk(0.0, 0.0, lat, lon, cap, radius, 4)
+
+    assert len(top) == 2
+    assert list(top) == baseline_topk(distances, cap, radius, 4)
+
+
+def test_haversine_topk_no_candidates():
+    rng = np.random.default_rng(1)
+    lat, lon, cap = random_shelters(rng, 10)
+
+    top, _ = haversine_topk(0.0, 0.0, lat, lon, cap, 1e6, 4)
+
+    assert len(top) == 0
+
+
+@pytest.mark.parametrize("ids", [["north-school", "east-arena", "west-hall"], [11, 12, 13]])
+def test_evacuation_returns_shelter_ids_unchanged(monkeypatch, ids):
+    shelters = gpd.GeoDataFrame({
+        "id": ids,
+        "capacity": [100, 300, 200],
+        "geometry": [Point(0.0, 2.0), Point(1.0, 0.0), Point(-3.0, 0.0)]
+    })
+    monkeypatch.setitem(BACKEND.models._loaded, "shelters", ShelterData(shelters))
+
+    response = TestClient(app).post("/evacuation", json={
+        "start_point": {"lat": 0.0, "lon": 0.0},
+        "disaster_type": "flood",
+        "disaster_radius": 50
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["recommended_shelter"]["id"] == ids[1]
+    assert body["recommended_shelter"]["capacity"] == 300
+    assert [s["id"] for s in body["alternative_shelters"]] == [ids[0], ids[2]]
+
+
+def test_predict_flood_region_pick_matches_baseline_contains(monkeypatch):
+    # Region 0 partly overlaps region 1; region 2 lies entirely inside region 1
+    regions = gpd.GeoDataFrame({
+        "elevation": [1.0, 2.0, 3.0],  # doubles as an id for the region that was picked
+        "river_dist": [0.0, 0.0, 0.0],
+        "soil_moisture": [0.0, 0.0, 0.0],
+        "geometry": [box(0.0, 0.0, 0.05, 0.05), box(0.03, 0.03, 0.1, 0.1), box(0.06, 0.06, 0.08, 0.08)]
+    })
+    region_data = RegionData(regions)
+    assert region_data.cell2region  # the H3 fast path is actually exercised
+    monkeypatch.setitem(BACKEND.models._loaded, "regions", region_data)
+    monkeypatch.setitem(BACKEND.models._loaded, "flood_predictor", object())
+    monkeypatch.setattr(BACKEND, "positive_class_proba", lambda predictor, features: np.asarray(features)[:, 0])
+
+    rng = np.random.default_rng(0)
+    points = [(float(x), float(y)) for x, y in rng.uniform(-0.01, 0.11, (2000, 2))]
+    points += [(0.0, 0.02), (0.05, 0.04), (0.03, 0.03), (0.04, 0.04), (0.07, 0.07), (0.06, 0.07)]
+    for lon, lat in points:
+        baseline = regions[regions.geometry.contains(Point(lon, lat))]
+        expected = baseline.iloc[0]["elevation"] if len(baseline) else 0.0
+
+        assert PredictionService.predict_flood(Location(lat=lat, lon=lon)) == expected, (lon, lat)
+
+
+def write_and_count(builds):
+    def build(path):
+        builds.append(path)
+        with open(path, "w") as f:
+            f.write("built")
+    return build
+
+
+def test_build_artifact_skips_fresh_and_rebuilds_stale(tmp_path):
+    source, target = tmp_path / "model.pkl", tmp_path / "model.so"
+    source.write_text("v1")
+    builds = []
+
+    build_artifact(str(source), str(target), write_and_count(builds))
+    build_artifact(str(source), str(target), write_and_count(builds))
+    assert len(builds) == 1
+    assert target.read_text() == "built"
+
+    # A retrained source newer than the artifact triggers a rebuild
+    later = os.path.getmtime(target) + 10
+    os.utime(source, (later, later))
+    build_artifact(str(source), str(target), write_and_count(builds))
+    assert len(builds) == 2
+    assert builds[-1] != str(target)  # built under a temporary name, then moved into place
+
+    # Shipping only the derived artifact (source removed) keeps using it
+    source.unlink()
+    build_artifact(str(source), str(target), write_and_count(builds))
+    assert len(builds) == 2
+    assert target.read_text() == "built"
+
+
+def test_build_artifact_failure_leaves_no_partial_file(tmp_path):
+    source, target = tmp_path / "regions.geojson", tmp_path / "regions.parquet"
+    source.write_text("{}")
+
+    def failing_build(path):
+        with open(path, "w") as f:
+            f.write("partial")
+        raise RuntimeError("conversion failed")
+
+    with pytest.raises(RuntimeError):
+        build_artifact(str(source), str(target), failing_build)
+
+    assert not target.exists()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["regions.geojson", "regions.parquet.lock"]
+
+
+@pytest.mark.parametrize("start, time_window", [
+    (datetime(2024, 12, 28, 9, 30), 7),   # leap year into the next year
+    (datetime(2023, 12, 28, 9, 30), 7),   # non-leap year into the next year
+    (datetime(2024, 2, 26), 7),           # across Feb 29
+    (datetime(2023, 3, 1), 366),          # non-leap start, window ends on Feb 29 2024
+    (datetime(2024, 1, 1), 366),          # a whole leap year
+    (datetime(2023, 1, 1), 366),          # a whole non-leap year plus one day
+])
+def test_earthquake_features_day_of_year_matches_calendar(start, time_window):
+    dates = [start + timedelta(days=i) for i in range(time_window)]
+
+    features = PredictionService.prepare_earthquake_features(Location(lat=1.5, lon=-2.0), dates)
+
+    assert features.shape == (1, time_window, 5)
+    assert features[0, :, 2].tolist() == [d.timetuple().tm_yday for d in dates]
+
+
+@pytest.mark.parametrize("time_window", [0, -1, 367])
+def test_predict_rejects_out_of_range_time_window(time_window):
+    response = TestClient(app).post("/predict", json={
+        "location": {"lat": 0.0, "lon": 0.0},
+        "disaster_type": "earthquake",
+        "time_window": time_window
+    })
+
+    assert response.status_code == 422
+
+
+def test_prediction_stream_reports_failures_and_stays_open(monkeypatch):
+    async def failing_prediction(location, dates):
+        raise RuntimeError("bad input shape")
+
+    monkeypatch.setattr(BACKEND.PredictionService, "predict_earthquake", failing_prediction)
+    request = {"location": {"lat": 0.0, "lon": 0.0}, "disaster_type": "earthquake"}
+
+    with TestClient(app).websocket_connect("/predict/ws") as websocket:
+        websocket.send_json(request)
+        assert "bad input shape" in websocket.receive_json()["error"]
+
+        # The connection survives and keeps answering
+        websocket.send_json({**request, "disaster_type": "volcano"})
+        assert websocket.receive_json() == {"error": "Disaster type not supported"}
+
+
+class FakeModels(DisasterModels):
+    EVICTABLE = ('slow', 'fast')
+
+    def __init__(self):
+        super().__init__()
+        self.loading = threading.Event()
+        self.release = threading.Event()
+
+    @lazy_resource
+    def slow(self):
+        self.loading.set()
+        self.release.wait(5)
+        return object()
+
+    @lazy_resource
+    def fast(self):
+        return object()
+
+
+def test_eviction_skips_loading_resources_and_loads_are_independent():
+    models = FakeModels()
+    loader = threading.Thread(target=lambda: models.slow)
+    loader.start()
+    assert models.loading.wait(5)
+
+    # Another resource loads while "slow" holds its own lock, and eviction does not block on it
+    fast = models.fast
+    assert models.evict_idle(-1) == ['fast']
+    assert models.fast is not fast
+
+    models.release.set()
+    loader.join(5)
+    assert models.evict_idle(-1) == ['slow', 'fast']
+
+
+class FakeInfer:
+    """Stand-in for a model: records batch shapes and returns column 0 of each sample"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, batch):
+        self.batches.append(batch.shape)
+        if self.error is not None:
+            raise self.error
+        return batch[:, :, 0]
+
+
+def sample(value, timesteps=7):
+    return np.full((1, timesteps, 5), value, dtype=np.float32)
+
+
+def test_batcher_merges_concurrent_calls_and_returns_each_slice():
+    infer = FakeInfer()
+
+    async def scenario():
+        batcher = InferenceBatcher(infer, window=0.05)
+        batcher.start()
+        results = await asyncio.gather(*[batcher.predict(sample(i)) for i in range(5)])
+        batcher.worker.cancel()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert infer.batches == [(5, 7, 5)]
+    for i, result in enumerate(results):
+        assert result.shape == (1, 7)
+        assert (result == i).all()
+
+
+def test_batcher_groups_time_windows_separately():
+    infer = FakeInfer()
+
+    async def scenario():
+        batcher = InferenceBatcher(infer, window=0.05)
+        batcher.start()
+        results = await asyncio.gather(
+            batcher.predict(sample(1, 7)), batcher.predict(sample(2, 3)), batcher.predict(sample(3, 7))
+        )
+        batcher.worker.cancel()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert sorted(infer.batches) == [(1, 3, 5), (2, 7, 5)]
+    assert [r.shape for r in results] == [(1, 7), (1, 3), (1, 7)]
+    assert [float(r[0, 0]) for r in results] == [1, 2, 3]
+
+
+def test_batcher_sends_infer_errors_to_every_caller_in_the_group():
+    infer = FakeInfer(error=RuntimeError("bad shape"))
+
+    async def scenario():
+        batcher = InferenceBatcher(infer, window=0.05)
+        batcher.start()
+        results = await asyncio.gather(
+            *[batcher.predict(sample(i)) for i in range(3)], return_exceptions=True
+        )
+        batcher.worker.cancel()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert len(infer.batches) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_batcher_skips_cancelled_callers_and_keeps_running():
+    infer = FakeInfer()
+
+    async def scenario():
+        batcher = InferenceBatcher(infer, window=0.05)
+        batcher.start()
+        cancelled = asyncio.ensure_future(batcher.predict(sample(1)))
+        kept = asyncio.ensure_future(batcher.predict(sample(2)))
+        await asyncio.sleep(0)  # both requests are queued
+        cancelled.cancel()
+
+        kept_result = await kept
+        later_result = await batcher.predict(sample(3))  # the worker is still serving
+        worker_alive = not batcher.worker.done()
+        batcher.worker.cancel()
+        return cancelled, kept_result, later_result, worker_alive
+
+    cancelled, kept_result, later_result, worker_alive = asyncio.run(scenario())
+
+    assert cancelled.cancelled()
+    assert (kept_result == 2).all()
+    assert (later_result == 3).all()
+    assert worker_alive
+    assert infer.batches == [(2, 7, 5), (1, 7, 5)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def counting_fetch(calls, delay=0.01, error=None):
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return len(calls)
+    return fetch
+
+
+def test_ttl_cache_single_flight_then_serves_cached_result():
+    calls = []
+    cached = async_ttl_cache(30)(counting_fetch(calls))
+
+    async def scenario():
+        concurrent = await asyncio.gather(*[cached() for _ in range(10)])
+        return concurrent, await cached()
+
+    concurrent, again = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert concurrent == [1] * 10
+    assert again == 1
+
+
+def test_ttl_cache_refetches_after_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(BACKEND, "time", SimpleNamespace(monotonic=clock.monotonic))
+    calls = []
+    cached = async_ttl_cache(30)(counting_fetch(calls))
+
+    async def scenario():
+        first = await cached()
+        clock.now += 29
+        within_ttl = await cached()
+        clock.now += 2
+        expired = await cached()
+        return first, within_ttl, expired
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+    assert len(calls) == 2
+
+
+def test_ttl_cache_does_not_cache_failures():
+    calls = []
+    fetch = counting_fetch(calls, error=RuntimeError("upstream down"))
+    cached = async_ttl_cache(30)(fetch)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cached()
+        with pytest.raises(RuntimeError):
+            await cached()
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 2
+
+
+def test_ttl_cache_cancelled_waiter_does_not_cancel_shared_fetch():
+    calls = []
+    cached = async_ttl_cache(30)(counting_fetch(calls, delay=0.05))
+
+    async def scenario():
+        cancelled = asyncio.ensure_future(cached())
+        kept = asyncio.ensure_future(cached())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return cancelled, await kept, await cached()
+
+    cancelled, kept, later = asyncio.run(scenario())
+
+    assert cancelled.cancelled()
+    assert kept == 1
+    assert later == 1
+    assert len(calls) == 1